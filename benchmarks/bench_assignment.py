@@ -0,0 +1,119 @@
+"""Emails/second of the vectorised, salted assign_variations versus the per-email MD5 modulo.
+
+Before timing, it checks the assignment is sound:
+  * uniformity: bucket counts for equal, weighted and holdout splits against the
+    expected shares (chi-square goodness of fit), under several salts;
+  * salting: the buckets of two campaigns are independent (chi-square on the
+    contingency table), while the same salt reproduces every assignment;
+  * stability: reweighting the variations leaves the holdout membership unchanged.
+
+    python benchmarks/bench_assignment.py --emails 1000000
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.special import chdtrc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+
+VARIATIONS = [{'variation_name': f'Variation_{letter}'} for letter in 'ABC']
+ALPHA = 0.01 # Family-wise, Bonferroni-corrected over every test below
+
+
+def md5_modulo(emails, variations):
+    """The assignment this replaces: MD5 of the email, first 8 hex digits, modulo"""
+    names = [variation['variation_name'] for variation in variations]
+    count = len(names)
+    md5 = hashlib.md5
+    return [names[int(md5(email.encode()).hexdigest()[:8], 16) % count] for email in emails]
+
+
+def synthetic_emails(count, seed=7):
+    rng = np.random.default_rng(seed)
+    first = rng.integers(0, 10**6, count)
+    domains = np.array(['example.com', 'mail.example.org', 'corp.example.net', 'x.io'])[rng.integers(0, 4, count)]
+    return [f'user.{n}.{i}@{domain}' for i, (n, domain) in enumerate(zip(first, domains))]
+
+
+def goodness_of_fit(assigned, labels, shares):
+    observed = np.array([assigned.count(label) for label in labels], dtype=float)
+    expected = np.asarray(shares) * len(assigned)
+    statistic = ((observed - expected) ** 2 / expected).sum()
+    return chdtrc(len(labels) - 1, statistic), observed / len(assigned)
+
+
+def check_uniformity(emails):
+    cases = [
+        ('equal split', None, 0.0),
+        ('weighted 70/20/10', {'Variation_A': 7, 'Variation_B': 2, 'Variation_C': 1}, 0.0),
+        ('10% holdout', None, 0.1),
+        ('weighted + 20% holdout', {'Variation_A': 1, 'Variation_B': 1, 'Variation_C': 2}, 0.2),
+    ]
+    p_values = []
+    for label, weights, holdout in cases:
+        labels, boundaries = app.assignment_boundaries(VARIATIONS, weights, holdout)
+        shares = np.diff(np.concatenate([boundaries, [1.0]]), prepend=0.0)
+        used = [(name, share) for name, share in zip(labels, shares) if share > 0]
+        for salt in ('campaign-1', 'campaign-2', ''):
+            assigned = app.assign_variations(emails, VARIATIONS, salt, weights, holdout)
+            p_value, observed = goodness_of_fit(assigned, [name for name, _ in used], [share for _, share in used])
+            p_values.append(p_value)
+            shares_text = ' '.join(f'{share:.4f}' for share in observed)
+            print(f"  {label:<24} salt={salt!r:<13} p={p_value:.3f}  shares {shares_text}")
+
+    # Independence across campaigns: 3x3 contingency table of the two assignments
+    first = app.assign_variations(emails, VARIATIONS, 'campaign-1')
+    second = app.assign_variations(emails, VARIATIONS, 'campaign-2')
+    index = {variation['variation_name']: i for i, variation in enumerate(VARIATIONS)}
+    table = np.zeros((3, 3))
+    np.add.at(table, ([index[name] for name in first], [index[name] for name in second]), 1)
+    expected = table.sum(axis=1, keepdims=True) * table.sum(axis=0, keepdims=True) / table.sum()
+    p_value = chdtrc(4, ((table - expected) ** 2 / expected).sum())
+    p_values.append(p_value)
+    print(f"  campaigns independent    p={p_value:.3f}  same bucket in both: {np.trace(table) / table.sum():.4f}")
+
+    if app.assign_variations(emails, VARIATIONS, 'campaign-1') != first:
+        raise SystemExit('Assignment is not reproducible for the same salt')
+    if [app.assign_variation(email, VARIATIONS, 'campaign-1') for email in emails[:1000]] != first[:1000]:
+        raise SystemExit('assign_variation disagrees with assign_variations')
+    before = app.assign_variations(emails, VARIATIONS, 'campaign-1', None, 0.1)
+    after = app.assign_variations(emails, VARIATIONS, 'campaign-1', {'Variation_A': 5}, 0.1)
+    if [name == app.HOLDOUT_VARIATION for name in before] != [name == app.HOLDOUT_VARIATION for name in after]:
+        raise SystemExit('Reweighting variations moved recipients in or out of the holdout')
+
+    threshold = ALPHA / len(p_values)
+    failures = sum(p_value < threshold for p_value in p_values)
+    if failures:
+        raise SystemExit(f'{failures} of {len(p_values)} uniformity checks below p={threshold:.5f}')
+    print(f'Uniformity, salting and stability: OK (all {len(p_values)} p-values above {threshold:.5f})')
+
+
+def bench(label, assign, emails, batch_size):
+    start = time.perf_counter()
+    for offset in range(0, len(emails), batch_size):
+        assign(emails[offset:offset + batch_size], VARIATIONS)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {len(emails) / elapsed:12.0f} emails/s  ({elapsed:.2f}s for {len(emails)})")
+    return elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--emails', type=int, default=1_000_000)
+    parser.add_argument('--check-emails', type=int, default=200_000, help='Emails used by the uniformity checks')
+    parser.add_argument('--batch-size', type=int, default=app.UPLOAD_BATCH_SIZE, help='Emails per call, as in an upload chunk')
+    args = parser.parse_args()
+
+    check_uniformity(synthetic_emails(args.check_emails, seed=11))
+
+    emails = synthetic_emails(args.emails)
+    slow = bench('MD5 modulo', md5_modulo, emails, args.batch_size)
+    fast = bench('assign_variations', lambda batch, variations: app.assign_variations(batch, variations, 'campaign-1', {'Variation_A': 2}, 0.1),
+                 emails, args.batch_size)
+    print(f"Speed-up: {slow / fast:.1f}x")
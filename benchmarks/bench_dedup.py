@@ -0,0 +1,105 @@
+"""Upload rows/second with deduplication and suppression checks on and off.
+
+Runs in a scratch schema (dropped afterwards) on the database in DATABASE_URL:
+the suppression table is seeded server-side, then a synthetic CSV is streamed
+through load_recipients_csv twice, into two campaigns: once as shipped and once
+with RecipientDeduplicator.filter replaced by a pass-through. A share of the CSV
+rows repeat earlier ones (in a different case) and a share are suppressed.
+
+    python benchmarks/bench_dedup.py --rows 1000000 --suppressed 1000000
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+
+VARIATIONS = [{'variation_name': 'Variation_A'}, {'variation_name': 'Variation_B'}]
+
+
+def synthetic_csv(rows, duplicate_share, suppressed_share, suppressed_count, seed=5):
+    rng = np.random.default_rng(seed)
+    lines = ['email,first_name,last_name\n']
+    for i in range(rows):
+        draw = rng.random()
+        if i and draw < duplicate_share:
+            lines.append(f'User{rng.integers(0, i)}@Example.com,Dup,Row\n')
+        elif draw < duplicate_share + suppressed_share:
+            lines.append(f'blocked{rng.integers(0, suppressed_count)}@example.net,Blocked,Row\n')
+        else:
+            lines.append(f'user{i}@example.com,First,Last\n')
+    return ''.join(lines)
+
+
+def upload(conn, campaign_id, csv_text):
+    cursor = conn.cursor()
+    start = time.perf_counter()
+    stats = app.load_recipients_csv(cursor, campaign_id, io.StringIO(csv_text), VARIATIONS)
+    conn.commit()
+    cursor.close()
+    return stats, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--suppressed', type=int, default=1_000_000, help='Rows in the suppression table')
+    parser.add_argument('--duplicate-share', type=float, default=0.05)
+    parser.add_argument('--suppressed-share', type=float, default=0.02)
+    args = parser.parse_args()
+
+    schema = f'bench_dedup_{os.getpid()}'
+    admin = app.connect_for_migrations()
+    cursor = admin.cursor()
+    cursor.execute('SET lock_timeout = 0')
+    cursor.execute(f'CREATE SCHEMA {schema}')
+    cursor.execute(f'SET search_path = {schema}')
+    conn = None
+    try:
+        app.ensure_migrations_table(cursor)
+        for migration in app.MIGRATIONS:
+            app.apply_migration(admin, migration)
+        cursor.execute('''
+            INSERT INTO suppressions (email, reason)
+            SELECT 'blocked' || g || '@example.net', 'bounce' FROM generate_series(0, %s - 1) AS g
+        ''', [args.suppressed])
+        for name in ('with_checks', 'without_checks'):
+            cursor.execute('''
+                INSERT INTO campaigns (id, name, company_name, product_name, offer_details, campaign_type)
+                VALUES (%s, %s, 'Acme', 'Widget', '10%%', 'promotional')
+            ''', [name, name])
+        cursor.execute('VACUUM ANALYZE suppressions')
+
+        conn = app.psycopg2.connect(app.DATABASE_URL, sslmode=app.DATABASE_SSLMODE, options=f'-c search_path={schema}')
+        csv_text = synthetic_csv(args.rows, args.duplicate_share, args.suppressed_share, args.suppressed)
+
+        start = time.perf_counter()
+        app.suppression_list.refresh(conn)
+        conn.commit()
+        metrics = app.suppression_list.metrics()
+        print(f"Suppression list: {metrics['addresses']} hashes, {metrics['memory_bytes'] / 2**20:.1f} MB, "
+              f"loaded in {time.perf_counter() - start:.2f}s")
+
+        checked, checked_seconds = upload(conn, 'with_checks', csv_text)
+        filter_method = app.RecipientDeduplicator.filter
+        app.RecipientDeduplicator.filter = lambda self, chunk: chunk
+        try:
+            unchecked, unchecked_seconds = upload(conn, 'without_checks', csv_text)
+        finally:
+            app.RecipientDeduplicator.filter = filter_method
+
+        for label, stats, seconds in (('without checks', unchecked, unchecked_seconds), ('with checks', checked, checked_seconds)):
+            print(f"{label:<15} {args.rows / seconds:9.0f} rows/s  inserted={stats['recipients_added']} "
+                  f"duplicates={stats['duplicates_skipped']} suppressed={stats['suppressed_skipped']} ({seconds:.1f}s)")
+        print(f"Suppression list after upload: {app.suppression_list.metrics()}")
+    finally:
+        if conn is not None:
+            conn.close()
+        cursor.execute(f'DROP SCHEMA {schema} CASCADE')
+        admin.close()
@@ -0,0 +1,153 @@
+"""Query plans and timings for the recipients hot paths before and after migration 2's indexes.
+
+Runs in a scratch schema (dropped afterwards unless --keep) on the database in
+DATABASE_URL: the initial schema is created there, seeded server-side with
+synthetic campaigns and recipients, and every query is timed; then migration 2
+builds its indexes CONCURRENTLY and the same queries are timed again.
+
+    python benchmarks/bench_indexes.py --rows 2000000 --campaigns 40
+    python benchmarks/bench_indexes.py --rows 200000 --show-plans
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+
+# (label, SQL, wrap in a rolled-back transaction)
+QUERIES = [
+    ('next send batch', '''
+        SELECT id, email_address, first_name, variation_assigned, tracking_id
+        FROM recipients
+        WHERE campaign_id = %(campaign)s AND status = 'pending'
+        ORDER BY id
+        LIMIT 500
+        FOR UPDATE SKIP LOCKED
+    ''', True),
+    ('pending count', "SELECT COUNT(*) FROM recipients WHERE campaign_id = %(campaign)s AND status = 'pending'", False),
+    ('export small campaign', '''
+        SELECT id, email_address, variation_assigned, status, sent_at
+        FROM recipients WHERE campaign_id = %(small_campaign)s ORDER BY id
+    ''', False),
+    ('metrics aggregate', '''
+        SELECT variation_assigned,
+               COUNT(*) FILTER (WHERE status = 'sent'),
+               COUNT(*) FILTER (WHERE status = 'sent' AND opened_at IS NOT NULL)
+        FROM recipients WHERE campaign_id = %(campaign)s GROUP BY variation_assigned
+    ''', False),
+    ('variations lookup', "SELECT variation_name, subject_line FROM email_variations WHERE campaign_id = %(campaign)s", False),
+    ('campaign list', 'SELECT id, name, status FROM campaigns ORDER BY created_at DESC LIMIT 50', False),
+    ('delete campaign (cascade)', 'DELETE FROM campaigns WHERE id = %(small_campaign)s', True),
+]
+
+
+def seed(cursor, rows, campaigns, pending_share):
+    cursor.execute('''
+        INSERT INTO campaigns (id, name, company_name, product_name, offer_details, campaign_type, created_at, status)
+        SELECT 'campaign-' || g, 'Campaign ' || g, 'Acme', 'Widget', '10%% off', 'promotional',
+               now() - g * INTERVAL '1 hour', 'sent'
+        FROM generate_series(1, %s) AS g
+    ''', [campaigns])
+    # Plenty of small campaigns in email_variations so its campaign lookups are not trivially cheap
+    cursor.execute('''
+        INSERT INTO email_variations (id, campaign_id, variation_name, subject_line, email_body)
+        SELECT md5(c || v), 'campaign-' || c, 'Variation_' || v, 'Subject ' || v, repeat('Body text. ', 50)
+        FROM generate_series(1, %s) AS c, unnest(ARRAY['A', 'B', 'C']) AS v
+    ''', [campaigns])
+    # Campaign 1 is the big one being sent; the rest share the remaining rows
+    cursor.execute('''
+        INSERT INTO recipients (id, campaign_id, email_address, first_name, variation_assigned, status, tracking_id, sent_at, opened_at)
+        SELECT md5(g::text),
+               'campaign-' || CASE WHEN g %% 2 = 0 THEN 1 ELSE 2 + g %% (%(campaigns)s - 1) END,
+               'user' || g || '@example.com', 'User',
+               CASE g %% 3 WHEN 0 THEN 'Variation_A' WHEN 1 THEN 'Variation_B' ELSE 'Variation_C' END,
+               CASE WHEN random() < %(pending)s THEN 'pending' ELSE 'sent' END,
+               md5('t' || g),
+               now(),
+               CASE WHEN random() < 0.2 THEN now() END
+        FROM generate_series(1, %(rows)s) AS g
+    ''', {'rows': rows, 'campaigns': campaigns, 'pending': pending_share})
+    cursor.execute('VACUUM ANALYZE campaigns')
+    cursor.execute('VACUUM ANALYZE email_variations')
+    cursor.execute('VACUUM ANALYZE recipients')
+
+
+def measure(cursor, params, repeats, show_plans):
+    results = {}
+    for label, query, rollback in QUERIES:
+        timings = []
+        plan = None
+        for attempt in range(repeats):
+            if rollback:
+                cursor.execute('BEGIN')
+            start = time.perf_counter()
+            if attempt == 0:
+                cursor.execute('EXPLAIN (ANALYZE, BUFFERS) ' + query, params)
+                plan = [row[0] for row in cursor.fetchall()]
+            else:
+                cursor.execute(query, params)
+                if cursor.description:
+                    cursor.fetchall()
+                timings.append(time.perf_counter() - start)
+            if rollback:
+                cursor.execute('ROLLBACK')
+        results[label] = (statistics.median(timings) * 1000, plan)
+        if show_plans:
+            print(f"\n--- {label} ---")
+            print('\n'.join(plan))
+    return results
+
+
+def plan_summary(plan):
+    """The first scan node of a plan, e.g. 'Index Scan using idx_recipients_pending'"""
+    for line in plan:
+        text = line.strip().lstrip('-> ').strip()
+        if 'Scan' in text:
+            return text.split('  (')[0]
+    return plan[0].split('  (')[0]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--campaigns', type=int, default=40)
+    parser.add_argument('--pending-share', type=float, default=0.02, help='Fraction of recipients still pending')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--show-plans', action='store_true')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch schema')
+    args = parser.parse_args()
+
+    schema = f'bench_indexes_{os.getpid()}'
+    conn = app.connect_for_migrations()
+    cursor = conn.cursor()
+    cursor.execute('SET lock_timeout = 0')
+    cursor.execute(f'CREATE SCHEMA {schema}')
+    cursor.execute(f'SET search_path = {schema}')
+    try:
+        app.ensure_migrations_table(cursor)
+        app.apply_migration(conn, app.MIGRATIONS[0])
+
+        start = time.monotonic()
+        seed(cursor, args.rows, args.campaigns, args.pending_share)
+        print(f"Seeded {args.rows} recipients in {args.campaigns} campaigns in {time.monotonic() - start:.1f}s")
+        params = {'campaign': 'campaign-1', 'small_campaign': f'campaign-{args.campaigns}'}
+
+        before = measure(cursor, params, args.repeats, args.show_plans)
+        seconds = app.apply_migration(conn, app.MIGRATIONS[1])
+        # The rolled-back cascade delete above cleared the visibility map, as autovacuum would restore it
+        cursor.execute('VACUUM ANALYZE recipients')
+        print(f"Migration 2 ({app.MIGRATIONS[1].name}) built its indexes concurrently in {seconds:.1f}s")
+        after = measure(cursor, params, args.repeats, args.show_plans)
+
+        print(f"\n{'query':<26} {'before ms':>10} {'after ms':>10}  plan before -> after")
+        for label, _, _ in QUERIES:
+            (b_ms, b_plan), (a_ms, a_plan) = before[label], after[label]
+            print(f"{label:<26} {b_ms:>10.2f} {a_ms:>10.2f}  {plan_summary(b_plan)} -> {plan_summary(a_plan)}")
+    finally:
+        if not args.keep:
+            cursor.execute(f'DROP SCHEMA {schema} CASCADE')
+        conn.close()
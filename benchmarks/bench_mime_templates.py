@@ -0,0 +1,75 @@
+"""Messages/second of CompiledVariation.render() versus the per-recipient MIME rebuild.
+
+Also checks that both paths produce the same bytes (boundaries aside) for a
+mix of ASCII/Unicode bodies, with and without first names.
+
+    python benchmarks/bench_mime_templates.py --recipients 10000
+"""
+import argparse
+import base64
+import os
+import re
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+
+BOUNDARY = re.compile(rb'={15}\d{19}==')
+
+SAMPLES = [
+    ('Exclusive Offer Inside', 'Hi there,\n\nBig news! <a href="https://example.com/offer">See the offer</a>\n\n[Claim Your Spot Now]\n\nBest,\nAcme Team'),
+    ('🚀 Widget - Limited Time', 'Hello!\n\nWe have something exciting 🌟 for you.\r\n<a href="https://example.com/a">A</a> and <a href="https://example.com/b">B</a>\n\nWarmly,\nThe Acme Team\n'),
+    ("You're invited: a rather long subject line that will certainly need folding somewhere", 'No greeting at all.\nJust text.'),
+]
+NAMES = ['', 'Ana', 'Zoë', None]
+
+
+def raw_bytes(payload):
+    return BOUNDARY.sub(b'BOUNDARY', base64.urlsafe_b64decode(payload['raw']))
+
+
+def check_equivalence():
+    for subject, body in SAMPLES:
+        compiled = app.CompiledVariation(subject, body)
+        for name in NAMES:
+            for to in ('someone@example.com', 'a.very.long.address.' * 4 + '@example.com'):
+                tracking_id = str(uuid.uuid4())
+                expected = app.create_email_message(to, subject, app.personalize_body(body, name), tracking_id)
+                actual = compiled.render(to, name, tracking_id)
+                if raw_bytes(expected) != raw_bytes(actual):
+                    raise SystemExit(f"Mismatch for subject={subject!r} name={name!r} to={to!r}")
+    print(f"Equivalence: OK ({len(SAMPLES) * len(NAMES) * 2} combinations)")
+
+
+def bench(label, render, recipients):
+    start = time.perf_counter()
+    for email, first_name, tracking_id in recipients:
+        render(email, first_name, tracking_id)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {len(recipients) / elapsed:10.0f} msg/s  ({elapsed:.2f}s for {len(recipients)})")
+    return elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--recipients', type=int, default=10000)
+    args = parser.parse_args()
+
+    check_equivalence()
+
+    subject, body = SAMPLES[0]
+    recipients = [(f'user{i}@example.com', f'User{i}' if i % 3 else '', str(uuid.uuid4())) for i in range(args.recipients)]
+
+    def current_path(email, first_name, tracking_id):
+        return app.create_email_message(email, subject, app.personalize_body(body, first_name), tracking_id)
+
+    start = time.perf_counter()
+    compiled = app.CompiledVariation(subject, body)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    slow = bench('create_email_message', current_path, recipients)
+    fast = bench('CompiledVariation', compiled.render, recipients)
+    print(f"Speed-up: {slow / fast:.1f}x (compiling the template took {compile_ms:.2f} ms)")
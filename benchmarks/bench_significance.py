@@ -0,0 +1,52 @@
+"""Time significance_report() for growing numbers of variations.
+
+    python benchmarks/bench_significance.py --variations 2 5 20 --repeat 200
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import app
+
+
+def make_metrics(variations, sent, rng):
+    metrics = {}
+    for i in range(variations):
+        opened = int(rng.binomial(sent, 0.20 + 0.005 * i))
+        clicked = int(rng.binomial(opened, 0.15))
+        converted = int(rng.binomial(clicked, 0.10))
+        metrics[f'Variation_{i:02d}'] = app.build_variation_metrics(sent, opened, clicked, converted)
+    return metrics
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--variations', type=int, nargs='+', default=[2, 5, 20])
+    parser.add_argument('--sent', type=int, default=5000, help='Recipients sent per variation')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--samples', type=int, default=app.BAYES_SAMPLES)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    for variations in args.variations:
+        metrics = make_metrics(variations, args.sent, rng)
+        app.significance_report(metrics, samples=args.samples) # Warm-up
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            app.significance_report(metrics, samples=args.samples)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(f"{variations:3d} variations  median={timings[len(timings) // 2] * 1000:6.2f}ms  "
+              f"p99={timings[int(len(timings) * 0.99) - 1] * 1000:6.2f}ms  ({args.samples} draws x 3 metrics)")
+
+    small = make_metrics(20, 50, rng) # Exact Beta draws for small counts
+    start = time.perf_counter()
+    for _ in range(20):
+        app.significance_report(small, samples=args.samples)
+    print(f" 20 variations, 50 sent each (exact Beta path): {(time.perf_counter() - start) / 20 * 1000:.2f}ms")
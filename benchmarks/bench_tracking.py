@@ -0,0 +1,136 @@
+"""Latency and requests/second of the tracking fast path versus the Flask routes.
+
+In-process (default) calls both WSGI apps directly with prebuilt environs, so
+only the application code is measured. With --url it load-tests a running
+server over HTTP instead; run it once with TRACKING_FAST_PATH=false on the
+server to get the baseline. The fast path is also timed with bot/prefetch
+classification switched off, to show what the classifier costs per request.
+
+    python benchmarks/bench_tracking.py --requests 20000
+    python benchmarks/bench_tracking.py --url http://127.0.0.1:8000 --requests 5000 --threads 16
+"""
+import argparse
+import io
+import os
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+
+
+def percentile(sorted_samples, fraction):
+    return sorted_samples[min(int(fraction * len(sorted_samples)), len(sorted_samples) - 1)]
+
+
+def report(label, latencies, elapsed):
+    latencies.sort()
+    print(f"{label:<22} {len(latencies) / elapsed:9.0f} req/s  "
+          f"p50={percentile(latencies, 0.50) * 1000:.3f}ms p99={percentile(latencies, 0.99) * 1000:.3f}ms "
+          f"max={latencies[-1] * 1000:.3f}ms")
+
+
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148',
+    'Mozilla/5.0 (Windows NT 5.1; rv:11.0) Gecko Firefox/11.0 (via ggpht.com GoogleImageProxy)',
+    'Barracuda Sentinel (EE)',
+]
+
+
+def make_environ(path, query_string='', user_agent=USER_AGENTS[0], remote_addr='127.0.0.1'):
+    return {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': query_string,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '5000',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost:5000',
+        'HTTP_USER_AGENT': user_agent,
+        'REMOTE_ADDR': remote_addr,
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def start_response(status, headers, exc_info=None):
+    return None
+
+
+def bench_wsgi(label, wsgi_app, requests):
+    latencies = []
+    start = time.perf_counter()
+    for path, query_string, user_agent, remote_addr in requests:
+        t0 = time.perf_counter()
+        body = wsgi_app(make_environ(path, query_string, user_agent, remote_addr), start_response)
+        for _ in body:
+            pass
+        if hasattr(body, 'close'):
+            body.close()
+        latencies.append(time.perf_counter() - t0)
+    report(label, latencies, time.perf_counter() - start)
+
+
+def bench_http(label, base_url, requests, threads):
+    import requests as http
+
+    latencies = []
+    lock = threading.Lock()
+    chunks = [requests[i::threads] for i in range(threads)]
+
+    def worker(chunk):
+        session = http.Session()
+        local = []
+        for path, query_string, user_agent, _ in chunk:
+            t0 = time.perf_counter()
+            session.get(f"{base_url}{path}{'?' + query_string if query_string else ''}", allow_redirects=False,
+                        headers={'User-Agent': user_agent})
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    report(label, latencies, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--click-ratio', type=float, default=0.2, help='Fraction of requests that are clicks')
+    parser.add_argument('--url', help='Base URL of a running server to load-test over HTTP')
+    parser.add_argument('--threads', type=int, default=8, help='Client threads for --url')
+    args = parser.parse_args()
+
+    clicks = int(args.requests * args.click_ratio)
+    requests = [(f'/pixel/{uuid.uuid4()}', '') for _ in range(args.requests - clicks)]
+    requests += [(f'/click/{uuid.uuid4()}', 'url=https://example.com/offer?utm_source=email') for _ in range(clicks)]
+    requests = [(path, query_string, USER_AGENTS[i % len(USER_AGENTS)], f'198.51.100.{i % 250}')
+                for i, (path, query_string) in enumerate(requests)]
+
+    if args.url:
+        bench_http(f'HTTP x{args.threads}', args.url.rstrip('/'), requests, args.threads)
+    else:
+        fast_path = app.app.wsgi_app
+        if not isinstance(fast_path, app.TrackingFastPath):
+            fast_path = app.TrackingFastPath(fast_path)
+        bench_wsgi('Flask routes', fast_path.fallback, requests)
+        bench_wsgi('TrackingFastPath', fast_path, requests)
+        classifier, app.tracking_events.classifier = app.tracking_events.classifier, None
+        bench_wsgi('  without classifier', fast_path, requests)
+        app.tracking_events.classifier = classifier
+    print(f"tracking buffer: {app.tracking_events.metrics()}")
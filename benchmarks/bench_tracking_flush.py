@@ -0,0 +1,138 @@
+"""Events/second written by write_tracking_events, and the attribution edge cases it must not drop.
+
+Runs in a scratch schema (dropped afterwards) on the database in DATABASE_URL.
+Before timing, it checks the rows the time-based filters cannot judge yet:
+  * a sent recipient without sent_at (sent before it was recorded): its opens count
+    as human, since there is no send time to compare against;
+  * a recipient whose send is not recorded yet: its human open is handed back for
+    retry, and counted once the send is;
+  * a conversion flushed before its click: handed back, attributed after the click.
+Then a batch of opens (raw and human) for --recipients sent recipients is timed.
+
+    python benchmarks/bench_tracking_flush.py --recipients 200000
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+
+
+def add_recipient(cursor, campaign_id, status, sent_at):
+    tracking_id = str(uuid.uuid4())
+    cursor.execute('''
+        INSERT INTO recipients (id, campaign_id, email_address, variation_assigned, status, tracking_id, sent_at)
+        VALUES (%s, %s, %s, 'Variation_A', %s, %s, %s)
+    ''', [str(uuid.uuid4()), campaign_id, f'{tracking_id}@example.com', status, tracking_id, sent_at])
+    return tracking_id
+
+
+def flush(conn, pending):
+    events = {event_type: dict(pending.get(event_type, {})) for event_type in app.TRACKING_EVENT_COLUMNS}
+    waiting = app.write_tracking_events(conn, events, app.TRACKING_FLUSH_MAX_EVENTS)
+    conn.commit()
+    return {event_type: [tracking_id for tracking_id, _ in rows] for event_type, rows in waiting.items()}
+
+
+def counters(cursor, campaign_id):
+    cursor.execute('SELECT opened, human_opened, clicked, converted FROM variation_counters WHERE campaign_id = %s', [campaign_id])
+    return dict(zip(('opened', 'human_opened', 'clicked', 'converted'), cursor.fetchone() or (0, 0, 0, 0)))
+
+
+def check_edge_cases(conn):
+    cursor = conn.cursor()
+    now = datetime.now(timezone.utc)
+    hour_ago = (now - timedelta(hours=1)).replace(tzinfo=None)
+    cursor.execute('''
+        INSERT INTO campaigns (id, name, company_name, product_name, offer_details, campaign_type, status)
+        VALUES ('edge-cases', 'Edge cases', 'Acme', 'Widget', '10%%', 'promotional', 'sending')
+    ''')
+    legacy = add_recipient(cursor, 'edge-cases', 'sent', None)
+    in_flight = add_recipient(cursor, 'edge-cases', 'pending', None)
+    converting = add_recipient(cursor, 'edge-cases', 'sent', hour_ago)
+    app.increment_variation_counters(cursor, 'edge-cases', {'Variation_A': {'sent': 2}})
+    conn.commit()
+
+    opened_at = now - timedelta(minutes=10)
+    waiting = flush(conn, {
+        'human_opened': {legacy: opened_at, in_flight: opened_at},
+        'converted': {converting: now - timedelta(minutes=5)},
+    })
+    failures = []
+    if counters(cursor, 'edge-cases')['human_opened'] != 1:
+        failures.append('human open of a sent recipient without sent_at was not counted')
+    if waiting.get('human_opened') != [in_flight]:
+        failures.append(f"human open of an unrecorded send was not handed back for retry: {waiting}")
+    if waiting.get('converted') != [converting]:
+        failures.append(f"conversion flushed before its click was not handed back for retry: {waiting}")
+
+    cursor.execute("UPDATE recipients SET status = 'sent', sent_at = %s WHERE tracking_id = %s", [hour_ago, in_flight])
+    app.increment_variation_counters(cursor, 'edge-cases', {'Variation_A': {'sent': 1}})
+    conn.commit()
+    waiting = flush(conn, {
+        'clicked': {converting: now - timedelta(minutes=20)},
+        'human_opened': {in_flight: opened_at},
+        'converted': {converting: now - timedelta(minutes=5)},
+    })
+    result = counters(cursor, 'edge-cases')
+    if waiting:
+        failures.append(f"events still waiting after the send and click were recorded: {waiting}")
+    if result['human_opened'] != 2 or result['converted'] != 1:
+        failures.append(f"retried events were not counted: {result}")
+    cursor.close()
+
+    if failures:
+        raise SystemExit('\n'.join(failures))
+    print('Attribution edge cases: OK (no sent_at, unrecorded send, conversion before click)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--recipients', type=int, default=200_000)
+    args = parser.parse_args()
+
+    schema = f'bench_tracking_flush_{os.getpid()}'
+    admin = app.connect_for_migrations()
+    cursor = admin.cursor()
+    cursor.execute('SET lock_timeout = 0')
+    cursor.execute(f'CREATE SCHEMA {schema}')
+    cursor.execute(f'SET search_path = {schema}')
+    conn = None
+    try:
+        app.ensure_migrations_table(cursor)
+        for migration in app.MIGRATIONS:
+            app.apply_migration(admin, migration)
+        conn = app.psycopg2.connect(app.DATABASE_URL, sslmode=app.DATABASE_SSLMODE, options=f'-c search_path={schema}')
+        check_edge_cases(conn)
+
+        cursor.execute('''
+            INSERT INTO campaigns (id, name, company_name, product_name, offer_details, campaign_type, status)
+            VALUES ('timed', 'Timed', 'Acme', 'Widget', '10%%', 'promotional', 'sent')
+        ''')
+        cursor.execute('''
+            INSERT INTO recipients (id, campaign_id, email_address, variation_assigned, status, tracking_id, sent_at)
+            SELECT md5(g::text), 'timed', 'user' || g || '@example.com',
+                   CASE g %% 2 WHEN 0 THEN 'Variation_A' ELSE 'Variation_B' END,
+                   'sent', md5('t' || g), LOCALTIMESTAMP - INTERVAL '2 hours'
+            FROM generate_series(1, %s) AS g
+        ''', [args.recipients])
+        cursor.execute('VACUUM ANALYZE recipients')
+        cursor.execute('SELECT tracking_id FROM recipients WHERE campaign_id = %s', ['timed'])
+        opened_at = datetime.now(timezone.utc) - timedelta(hours=1)
+        opens = {tracking_id: opened_at for (tracking_id,) in cursor.fetchall()}
+
+        start = time.perf_counter()
+        waiting = flush(conn, {'opened': opens, 'human_opened': opens})
+        elapsed = time.perf_counter() - start
+        print(f"write_tracking_events {2 * len(opens) / elapsed:9.0f} events/s  ({2 * len(opens)} events in {elapsed:.1f}s, "
+              f"{sum(map(len, waiting.values()))} handed back)")
+    finally:
+        if conn is not None:
+            conn.close()
+        cursor.execute(f'DROP SCHEMA {schema} CASCADE')
+        admin.close()
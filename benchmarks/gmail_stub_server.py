@@ -0,0 +1,106 @@
+"""Local stand-in for the Gmail API's messages.send endpoint.
+
+Answers POST .../users/<user>/messages/send with a fake message id after an
+optional delay, and enforces a per-second quota (429 with rateLimitExceeded)
+and a random 503 rate, so GmailSender's concurrency, throttling and retries
+can be exercised without a Google account.
+
+    python benchmarks/gmail_stub_server.py --port 8765 --quota 2500 --latency 0.05
+    GMAIL_API_ENDPOINT=http://127.0.0.1:8765 MAIL_TRANSPORT=gmail python app.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SEND_QUOTA_COST = 100
+
+
+class StubState:
+    def __init__(self, quota_units_per_second, latency, error_rate):
+        self.quota = quota_units_per_second
+        self.latency = latency
+        self.error_rate = error_rate
+        self.tokens = quota_units_per_second
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.counts = {'sent': 0, 'rate_limited': 0, 'errors': 0}
+
+    def take_quota(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.quota, self.tokens + (now - self.updated) * self.quota)
+            self.updated = now
+            if self.tokens < SEND_QUOTA_COST:
+                self.counts['rate_limited'] += 1
+                return False
+            self.tokens -= SEND_QUOTA_COST
+            return True
+
+
+def make_handler(state):
+    class GmailStubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if not self.path.split('?')[0].endswith('/messages/send'):
+                self._reply(404, {'error': {'code': 404, 'message': 'Not found'}})
+                return
+            if state.latency:
+                time.sleep(state.latency)
+            if state.quota and not state.take_quota():
+                self._reply(429, {'error': {'code': 429, 'message': 'User-rate limit exceeded',
+                                            'errors': [{'reason': 'rateLimitExceeded'}]}})
+                return
+            if state.error_rate and random.random() < state.error_rate:
+                with state.lock:
+                    state.counts['errors'] += 1
+                self._reply(503, {'error': {'code': 503, 'message': 'Backend Error'}})
+                return
+            with state.lock:
+                state.counts['sent'] += 1
+            self._reply(200, {'id': uuid.uuid4().hex[:16], 'threadId': uuid.uuid4().hex[:16], 'labelIds': ['SENT']})
+
+    return GmailStubHandler
+
+
+def start_stub_server(port=0, quota_units_per_second=0, latency=0.0, error_rate=0.0):
+    """Start the stub in a background thread; returns (server, state, base_url)"""
+    state = StubState(quota_units_per_second, latency, error_rate)
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--quota', type=float, default=250, help='Quota units per second (0 disables the limit)')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds per request')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+    args = parser.parse_args()
+
+    server, state, url = start_stub_server(args.port, args.quota, args.latency, args.error_rate)
+    print(f"Gmail stub listening on {url} (quota {args.quota} units/s, latency {args.latency}s, error rate {args.error_rate})")
+    try:
+        while True:
+            time.sleep(10)
+            print(state.counts)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,114 @@
+"""Salted, weighted variation assignment: hashing, split shares, holdout, salting and determinism."""
+import numpy as np
+import pytest
+from scipy.special import chdtrc
+
+import app
+
+VARIATIONS = [{'variation_name': f'Variation_{letter}'} for letter in 'ABC']
+NAMES = [variation['variation_name'] for variation in VARIATIONS]
+MASK = 0xFFFFFFFFFFFFFFFF
+
+
+def reference_hash(email, salt=''):
+    """One email at a time: FNV-1a over salt, NUL and the lowercased email, then murmur3's fmix64"""
+    state = 0xcbf29ce484222325
+    for byte in salt.encode('utf-8') + b'\x00' + email.lower().encode('utf-8'):
+        state = ((state ^ byte) * 0x100000001b3) & MASK
+    state ^= state >> 33
+    state = (state * 0xff51afd7ed558ccd) & MASK
+    state ^= state >> 33
+    state = (state * 0xc4ceb9fe1a85ec53) & MASK
+    state ^= state >> 33
+    return state
+
+
+@pytest.fixture(scope='module')
+def emails():
+    rng = np.random.default_rng(11)
+    numbers = rng.integers(0, 10**7, 100_000)
+    domains = np.array(['example.com', 'mail.example.org', 'corp.example.net', 'x.io'])[rng.integers(0, 4, len(numbers))]
+    return [f'user.{n}.{i}@{domain}' for i, (n, domain) in enumerate(zip(numbers, domains))]
+
+
+def shares_p_value(assigned, expected_shares):
+    labels = list(expected_shares)
+    observed = np.array([assigned.count(label) for label in labels], dtype=float)
+    expected = np.array([expected_shares[label] for label in labels]) * len(assigned)
+    return chdtrc(len(labels) - 1, ((observed - expected) ** 2 / expected).sum())
+
+
+def test_hash_emails_matches_scalar_reference():
+    emails = ['a@b.co', 'Someone.Else@Example.COM', 'zoë@exämple.de', 'x' * 70 + '@long.example', '李@例子.中国', 'a@b.co']
+    for salt in ('', 'campaign-1', 'sålt'):
+        assert app.hash_emails(emails, salt).tolist() == [reference_hash(email, salt) for email in emails]
+    assert app.hash_emails([], 'campaign-1').tolist() == []
+
+
+def test_hash_emails_ignores_case():
+    assert app.hash_emails(['Ana@Example.com'], 's')[0] == app.hash_emails(['ana@example.com'], 's')[0]
+
+
+@pytest.mark.parametrize('weights, holdout, expected', [
+    (None, 0.0, {'Variation_A': 1 / 3, 'Variation_B': 1 / 3, 'Variation_C': 1 / 3}),
+    ({'Variation_A': 7, 'Variation_B': 2, 'Variation_C': 1}, 0.0, {'Variation_A': 0.7, 'Variation_B': 0.2, 'Variation_C': 0.1}),
+    (None, 0.1, {app.HOLDOUT_VARIATION: 0.1, 'Variation_A': 0.3, 'Variation_B': 0.3, 'Variation_C': 0.3}),
+    ({'Variation_C': 2}, 0.2, {app.HOLDOUT_VARIATION: 0.2, 'Variation_A': 0.2, 'Variation_B': 0.2, 'Variation_C': 0.4}),
+])
+@pytest.mark.parametrize('salt', ['', 'campaign-1', 'campaign-2'])
+def test_split_shares_match_weights_and_holdout(emails, weights, holdout, expected, salt):
+    assigned = app.assign_variations(emails, VARIATIONS, salt, weights, holdout)
+    assert set(assigned) == set(expected)
+    assert shares_p_value(assigned, expected) > 0.001
+
+
+def test_zero_weight_variation_gets_nobody(emails):
+    assigned = app.assign_variations(emails[:20_000], VARIATIONS, 'c', {'Variation_B': 0})
+    assert 'Variation_B' not in assigned and set(assigned) == {'Variation_A', 'Variation_C'}
+
+
+def test_salts_give_independent_assignments(emails):
+    first = app.assign_variations(emails, VARIATIONS, 'campaign-1')
+    second = app.assign_variations(emails, VARIATIONS, 'campaign-2')
+    index = {name: i for i, name in enumerate(NAMES)}
+    table = np.zeros((3, 3))
+    np.add.at(table, ([index[name] for name in first], [index[name] for name in second]), 1)
+    expected = table.sum(axis=1, keepdims=True) * table.sum(axis=0, keepdims=True) / table.sum()
+    assert chdtrc(4, ((table - expected) ** 2 / expected).sum()) > 0.001
+    assert np.trace(table) / table.sum() == pytest.approx(1 / 3, abs=0.01)
+
+
+def test_assignment_is_deterministic(emails):
+    sample = emails[:5000]
+    assigned = app.assign_variations(sample, VARIATIONS, 'campaign-1', {'Variation_A': 2}, 0.1)
+    assert app.assign_variations(sample, VARIATIONS, 'campaign-1', {'Variation_A': 2}, 0.1) == assigned
+    # Batch boundaries and order do not matter: each email is assigned on its own
+    assert app.assign_variations(sample[::-1], VARIATIONS, 'campaign-1', {'Variation_A': 2}, 0.1) == assigned[::-1]
+    assert [app.assign_variation(email, VARIATIONS, 'campaign-1', {'Variation_A': 2}, 0.1) for email in sample[:200]] == assigned[:200]
+    assert app.assign_variations([email.upper() for email in sample[:200]], VARIATIONS, 'campaign-1', {'Variation_A': 2}, 0.1) == assigned[:200]
+
+
+def test_reweighting_keeps_the_holdout_group(emails):
+    before = app.assign_variations(emails, VARIATIONS, 'campaign-1', None, 0.1)
+    after = app.assign_variations(emails, VARIATIONS, 'campaign-1', {'Variation_A': 5}, 0.1)
+    assert [name == app.HOLDOUT_VARIATION for name in before] == [name == app.HOLDOUT_VARIATION for name in after]
+
+
+@pytest.mark.parametrize('weights, holdout', [
+    ({'Variation_A': -1}, 0.0),
+    ({'Variation_A': 0, 'Variation_B': 0, 'Variation_C': 0}, 0.0),
+    (None, app.MAX_HOLDOUT_FRACTION + 0.01),
+    (None, -0.1),
+])
+def test_invalid_splits_are_rejected(weights, holdout):
+    with pytest.raises(ValueError):
+        app.assignment_boundaries(VARIATIONS, weights, holdout)
+
+
+def test_parse_assignment_weights():
+    assert app.parse_assignment_weights(None) is None
+    assert app.parse_assignment_weights('{"Variation_A": 2}') == {'Variation_A': 2.0}
+    with pytest.raises(ValueError):
+        app.parse_assignment_weights({'Variation_A': -1})
+    with pytest.raises(ValueError):
+        app.parse_assignment_weights('[1, 2]')
@@ -0,0 +1,36 @@
+"""Upload deduplication: hash membership and the database-side address normalization."""
+import numpy as np
+import pytest
+
+import app
+
+
+def test_hash_hits_marks_members_only():
+    sorted_hashes = np.unique(app.hash_emails(['a@x.com', 'b@x.com', 'c@x.com']))
+    hashes = app.hash_emails(['b@x.com', 'd@x.com', 'c@x.com', 'a@x.com'])
+    assert app.hash_hits(sorted_hashes, hashes).tolist() == [True, False, True, True]
+
+
+def test_hash_hits_beyond_the_largest_and_on_empty():
+    sorted_hashes = np.array([5, 10], dtype=np.uint64)
+    assert app.hash_hits(sorted_hashes, np.array([11, 10, 0], dtype=np.uint64)).tolist() == [False, True, False]
+    assert app.hash_hits(np.empty(0, dtype=np.uint64), np.array([1], dtype=np.uint64)).tolist() == [False]
+
+
+@pytest.fixture
+def cursor():
+    if not app.DATABASE_URL:
+        pytest.skip('DATABASE_URL is not set')
+    conn = app.psycopg2.connect(app.DATABASE_URL, sslmode=app.DATABASE_SSLMODE)
+    yield conn.cursor()
+    conn.close()
+
+
+def test_normalize_emails_matches_sql_lower(cursor):
+    emails = [' Ana@Example.COM ', 'ÉLODIE@example.com', 'b@x.com', '']
+    normalized = app.normalize_emails(cursor, emails)
+    cursor.execute('SELECT lower(email) FROM unnest(%s::text[]) WITH ORDINALITY AS input(email, position) ORDER BY position',
+                   [[email.strip() for email in emails]])
+    assert normalized == [row[0] for row in cursor.fetchall()]
+    assert normalized[0] == 'ana@example.com'
+    assert app.normalize_emails(cursor, []) == []
@@ -0,0 +1,65 @@
+"""CompiledVariation.render() must produce exactly the bytes the email package writes."""
+import base64
+import email
+import email.generator
+import uuid
+
+import pytest
+
+import app
+
+LONG_LINE = 'This sentence keeps going well past the seventy-eight characters a mail line should have, ' * 3
+
+SUBJECTS = [
+    'Exclusive Offer Inside',
+    '🚀 Widget - Limited Time',
+    'Größte Rabatte für Sie, nur heute: jetzt zugreifen, bevor das Angebot auf immer und ewig endet',
+    "You're invited: a rather long subject line that will certainly need folding somewhere after column 78",
+    'Mixed ASCII and ünïcödé words in a subject that is long enough to be folded into several encoded-words',
+]
+BODIES = [
+    'Hi there,\n\nBig news! <a href="https://example.com/offer">See the offer</a>\n\nBest,\nAcme Team',
+    'Hello!\n\nWe have something exciting 🌟 for you.\r\n<a href="https://example.com/a">A</a>\rend\n',
+    'No greeting at all.\n' + LONG_LINE + '\nJust text.',
+    'Hi there, ' + LONG_LINE + 'Hello! ' + 'ü' * 200,
+]
+NAMES = ['', None, 'Ana', 'Zoë', 'José María', '李']
+RECIPIENTS = [
+    'someone@example.com',
+    'a.very.long.address.' * 4 + '@example.com',
+    '"Zoë Müller" <zoe@example.com>',
+    'Renée Françoise de la Fontaine-Beaumarchais <renee.francoise@example.com>',
+]
+
+
+def decoded(payload):
+    return base64.urlsafe_b64decode(payload['raw'])
+
+
+@pytest.mark.parametrize('subject', SUBJECTS)
+@pytest.mark.parametrize('body', BODIES)
+def test_render_matches_email_package(subject, body, monkeypatch):
+    compiled = app.CompiledVariation(subject, body)
+    # The email package picks a random boundary at flatten time; use the compiled one
+    monkeypatch.setattr(email.generator.Generator, '_make_boundary', classmethod(lambda cls, text=None: compiled.boundary))
+    for first_name in NAMES:
+        for to_email in RECIPIENTS:
+            tracking_id = str(uuid.uuid4())
+            expected = app.create_email_message(to_email, subject, app.personalize_body(body, first_name), tracking_id)
+            assert decoded(compiled.render(to_email, first_name, tracking_id)) == decoded(expected), (first_name, to_email)
+
+
+def test_unusual_tracking_id_matches_email_package(monkeypatch):
+    compiled = app.CompiledVariation(SUBJECTS[0], BODIES[0])
+    monkeypatch.setattr(email.generator.Generator, '_make_boundary', classmethod(lambda cls, text=None: compiled.boundary))
+    tracking_id = 'legacy-' + 'x' * 80
+    expected = app.create_email_message(RECIPIENTS[0], SUBJECTS[0], app.personalize_body(BODIES[0], 'Ana'), tracking_id)
+    assert decoded(compiled.render(RECIPIENTS[0], 'Ana', tracking_id)) == decoded(expected)
+
+
+def test_boundary_collision_falls_back_to_email_package():
+    compiled = app.CompiledVariation(SUBJECTS[0], BODIES[0])
+    first_name = f'--{compiled.boundary}'
+    message = email.message_from_bytes(decoded(compiled.render(RECIPIENTS[0], first_name, str(uuid.uuid4()))))
+    assert message.get_boundary() != compiled.boundary
+    assert [part.get_payload() for part in message.get_payload()][0] == app.personalize_body(BODIES[0], first_name)
@@ -0,0 +1,40 @@
+"""Keyset cursors of the campaign list."""
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+import app
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 3, 9, 17, 45, 12, 123456)
+    cursor = app.encode_page_cursor(created_at, 'campaign-42')
+    assert app.decode_page_cursor(cursor) == (created_at, 'campaign-42')
+
+
+def test_cursor_is_url_safe_without_padding():
+    for campaign_id in ('a', 'ab', 'abc', '?>~' * 7):
+        cursor = app.encode_page_cursor(datetime(2024, 1, 1), campaign_id)
+        assert '=' not in cursor and '+' not in cursor and '/' not in cursor
+        assert app.decode_page_cursor(cursor)[1] == campaign_id
+
+
+def encode(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+@pytest.mark.parametrize('cursor', [
+    '',
+    'not base64!',
+    base64.urlsafe_b64encode(b'\xff\xfe').decode('ascii'),
+    encode(5),
+    encode(['2024-01-01T00:00:00']),
+    encode(['2024-01-01T00:00:00', 'a', 'b']),
+    encode(['yesterday', 'a']),
+    encode([20240101, 'a']),
+])
+def test_invalid_cursors_raise_value_error(cursor):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        app.decode_page_cursor(cursor)
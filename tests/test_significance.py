@@ -0,0 +1,81 @@
+"""Significance tests for campaign results, checked against scipy's reference implementations."""
+import warnings
+
+import numpy as np
+import pytest
+from scipy import stats
+
+import app
+
+
+def test_z_tests_match_pooled_formula():
+    successes = np.array([120.0, 150.0, 90.0])
+    trials = np.array([1000.0, 1000.0, 800.0])
+    z, p = app.two_proportion_z_tests(successes, trials, 0)
+    for i in (1, 2):
+        pooled = (successes[i] + successes[0]) / (trials[i] + trials[0])
+        se = np.sqrt(pooled * (1 - pooled) * (1 / trials[i] + 1 / trials[0]))
+        expected = (successes[i] / trials[i] - successes[0] / trials[0]) / se
+        assert z[i] == pytest.approx(expected)
+        assert p[i] == pytest.approx(2 * stats.norm.sf(abs(expected)))
+    assert z[0] == 0 and p[0] == 1
+
+
+def test_chi_square_matches_scipy():
+    successes = np.array([30.0, 45.0, 38.0])
+    trials = np.array([500.0, 510.0, 490.0])
+    statistic, dof, p = app.chi_square_test(successes, trials)
+    expected = stats.chi2_contingency(np.stack([successes, trials - successes]), correction=False)
+    assert statistic == pytest.approx(expected.statistic)
+    assert dof == expected.dof
+    assert p == pytest.approx(expected.pvalue)
+
+
+def test_wilson_intervals_match_scipy():
+    successes = np.array([5.0, 0.0, 97.0])
+    trials = np.array([10.0, 40.0, 100.0])
+    low, high = app.wilson_intervals(successes, trials, alpha=0.05)
+    for i in range(3):
+        expected = stats.binomtest(int(successes[i]), int(trials[i])).proportion_ci(0.95, method='wilson')
+        assert low[i] == pytest.approx(expected.low)
+        assert high[i] == pytest.approx(expected.high)
+
+
+def test_variations_without_sends_are_neutral_and_silent():
+    successes = np.array([0.0, 12.0, 0.0])
+    trials = np.array([0.0, 100.0, 0.0])
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        z, p = app.two_proportion_z_tests(successes, trials, 0)
+        low, high = app.wilson_intervals(successes, trials)
+        statistic, dof, chi_p = app.chi_square_test(successes, trials)
+    assert z.tolist() == [0.0, 0.0, 0.0] and p.tolist() == [1.0, 1.0, 1.0]
+    assert (low[0], high[0]) == (0.0, 1.0)
+    assert (statistic, dof, chi_p) == (0.0, 0, 1.0)
+
+
+def test_bayesian_comparison_favours_the_better_variation():
+    successes = np.array([50.0, 80.0, 3.0])
+    trials = np.array([1000.0, 1000.0, 10.0]) # The last one takes the exact (small-count) path
+    beats_control, best = app.bayesian_comparison(successes, trials, 0, samples=20000, rng=np.random.default_rng(1))
+    assert beats_control[1] > 0.99
+    assert best.sum() == pytest.approx(1.0)
+    # Beta(4, 8) against a posterior tightly around 5%: almost surely better
+    assert beats_control[2] > 0.95
+
+
+def test_significance_report_is_reproducible_and_json_safe():
+    metrics = {
+        'Variation_A': app.build_variation_metrics(1000, 0, 0, 0),
+        'Variation_B': app.build_variation_metrics(1000, 40, 12, 2),
+        'Variation_C': app.build_variation_metrics(0, 0, 0, 0),
+    }
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        first = app.significance_report(metrics)
+    assert first == app.significance_report(metrics)
+    assert first['control'] == 'Variation_A'
+    opened = first['open_rate']['variations']
+    assert opened['Variation_B']['lift'] is None # Control rate 0: no finite lift
+    assert opened['Variation_C']['p_value'] == 1.0
+    assert app.significance_report({'Variation_A': metrics['Variation_A']}) is None
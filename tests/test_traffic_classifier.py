@@ -0,0 +1,76 @@
+"""Scanner/prefetch classification of opens and clicks."""
+import pytest
+
+import app
+
+BROWSER = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36'
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(app.time, 'monotonic', clock)
+    return clock
+
+
+def classifier(ranges=(), burst_events=3, burst_seconds=2, **kwargs):
+    return app.TrafficClassifier(app.BOT_USER_AGENT_TOKENS, app.load_ip_ranges(ranges), burst_events, burst_seconds, **kwargs)
+
+
+@pytest.mark.parametrize('user_agent', [
+    'Googlebot/2.1 (+http://www.google.com/bot.html)',
+    'python-requests/2.32.3',
+    'curl/8.5.0',
+    'Mozilla/5.0 (compatible; Barracuda Sentinel)',
+    'Mozilla/5.0 HeadlessChrome/120.0',
+])
+def test_scanner_user_agents_are_flagged(user_agent, clock):
+    assert classifier().classify('opened', 't1', user_agent, None) == 'user_agent'
+
+
+def test_browser_user_agent_is_human(clock):
+    assert classifier().classify('opened', 't1', BROWSER, '203.0.113.9') is None
+
+
+@pytest.mark.parametrize('user_agent', [None, ''])
+def test_missing_user_agent_is_unknown_by_default(user_agent, clock):
+    assert classifier().classify('opened', 't1', user_agent, '203.0.113.9') is None
+    assert classifier(flag_missing_user_agent=True).classify('opened', 't2', user_agent, None) == 'user_agent'
+
+
+def test_ip_ranges_are_merged_and_matched(clock):
+    ranges = ['198.51.100.0/25', '198.51.100.128/25', '2001:db8::/32,provider', '# comment', 'not-a-cidr']
+    starts, ends = app.load_ip_ranges(ranges)[4]
+    assert len(starts) == 1 and ends[0] - starts[0] == 255 # The two /25s merge into one /24
+    flagging = classifier(ranges)
+    assert flagging.classify('opened', 't1', BROWSER, '198.51.100.200') == 'ip_range'
+    assert flagging.classify('opened', 't2', BROWSER, '2001:db8::1') == 'ip_range'
+    assert flagging.classify('opened', 't3', BROWSER, '198.51.101.1') is None
+    assert flagging.classify('opened', 't4', BROWSER, 'garbage') is None
+
+
+def test_burst_of_one_message_is_flagged_within_the_window(clock):
+    flagging = classifier(burst_events=3, burst_seconds=2)
+    assert flagging.classify('clicked', 't1', BROWSER, None) is None
+    clock.now += 0.5
+    assert flagging.classify('clicked', 't1', BROWSER, None) is None
+    clock.now += 0.5
+    assert flagging.classify('clicked', 't1', BROWSER, None) == 'burst'
+    assert flagging.in_burst('clicked', 't1')
+    assert not flagging.in_burst('opened', 't1') # Event types are counted separately
+    assert flagging.counts['burst'] == 1
+
+
+def test_events_spread_past_the_window_are_not_a_burst(clock):
+    flagging = classifier(burst_events=3, burst_seconds=2)
+    for _ in range(3):
+        assert flagging.classify('opened', 't1', BROWSER, None) is None
+        clock.now += 1.5